@@ -1,5 +1,5 @@
 from libzfseasy.zfs import List, Create, Snapshot, Bookmark, Destroy, Rename, Allow, UnAllow, Clone, Get, Set, \
-     Inherit, Send, Receive, ChangeKey, LoadKey, UnLoadKey
+     Inherit, Send, Receive, ChangeKey, LoadKey, UnLoadKey, ZFSError
 
 list = List()
 create = Create()
@@ -51,24 +51,35 @@ class Validate:
     name = r'[\w\.:_\-]+'
     snaps = r'[\w\.:_\-]*([\w\.:_\-]|%)*[\w\.:_\-]*(,[\w\.:_\-]*([\w\.:_\-]|%)*[\w\.:_\-]*)*'
 
+    _zfsname_re = re.compile('^' + name + '$')
+    _dataset_re = re.compile('^' + pool + ds + '*$')
+    _snapshot_re = re.compile('^' + pool + ds + '*@' + name + '$')
+    _snapshots_re = re.compile('^' + pool + ds + '*@' + snaps + '$')
+    _bookmark_re = re.compile('^' + pool + ds + '*#' + name + '$')
+
+    _types = frozenset(['filesystem', 'snapshot', 'volume', 'bookmark', 'all'])
+    _sources = frozenset(['local', 'default', 'inherited', 'temporary', 'received', 'all'])
+    _propfields = frozenset(['name', 'property', 'value', 'received', 'source', 'all'])
+    _properties = frozenset(PropertyNames.all)
+
     @staticmethod
     def zfsname(s: str) -> None:
-        if not bool(re.match('^' + Validate.name + '$', s)):
+        if not Validate._zfsname_re.match(s):
             raise ValueError(s + ' is not a valid ZFS name')
 
     @staticmethod
     def type(s: str) -> None:
-        if s.lower() not in ['filesystem', 'snapshot', 'volume', 'bookmark', 'all']:
+        if s not in Validate._types and s.lower() not in Validate._types:
             raise ValueError(s + ' is not a valid ZFS type')
 
     @staticmethod
     def source(s: str) -> None:
-        if s.lower() not in ['local', 'default', 'inherited', 'temporary', 'received', 'all']:
+        if s not in Validate._sources and s.lower() not in Validate._sources:
             raise ValueError(s + ' is not a valid ZFS type')
 
     @staticmethod
     def propfield(s: str) -> None:
-        if s.lower() not in ['name', 'property', 'value', 'received', 'source', 'all']:
+        if s not in Validate._propfields and s.lower() not in Validate._propfields:
             raise ValueError(s + ' is not a valid field')
 
     @staticmethod
@@ -77,7 +88,7 @@ class Validate:
             Validate.zfsname(s)
         except ValueError:
             raise ValueError(s + ' is not a valid ZFS property name')
-        if (':' not in s) and (s not in PropertyNames.all):
+        if (':' not in s) and (s not in Validate._properties):
             raise ValueError(s + ' is not a valid ZFS property name')
 
     @staticmethod
@@ -86,40 +97,34 @@ class Validate:
 
     @staticmethod
     def dataset(s: str) -> None:
-        if not bool(re.match('^' + Validate.pool + Validate.ds + '*$', s)):
+        if not Validate._dataset_re.match(s):
             raise ValueError(s + ' is not a valid ZFS dataset name')
 
     @staticmethod
     def snapshot(s: str) -> None:
-        if not bool(re.match('^' + Validate.pool + Validate.ds + '*@' + Validate.name + '$', s)):
+        if not Validate._snapshot_re.match(s):
             raise ValueError(s + ' is not a valid ZFS snapshot name')
 
     @staticmethod
     def snapshots(s: str) -> None:
-        if not bool(re.match('^' + Validate.pool + Validate.ds + '*@' + Validate.snaps + '$', s)):
+        if not Validate._snapshots_re.match(s):
             raise ValueError(s + ' is not a valid ZFS snapshot name')
 
     @staticmethod
     def bookmark(s: str) -> None:
-        if not bool(re.match('^' + Validate.pool + Validate.ds + '*#' + Validate.name + '$', s)):
+        if not Validate._bookmark_re.match(s):
             raise ValueError(s + ' is not a valid ZFS bookmark name')
 
 
 class Property:
 
+    __slots__ = ('value', '_source', '_received')
+
     def __init__(self, value: str, source: Optional[str] = None, received: Optional[str] = None):
-        self._value = value
+        self.value = value
         self._source = source
         self._received = received
 
-    @property
-    def value(self):
-        return self._value
-
-    @value.setter
-    def value(self, value):
-        self._value = value
-
     @property
     def source(self):
         return self._source
@@ -129,10 +134,9 @@ class Property:
         return self._received
 
     def __str__(self):
-        return self._value
+        return self.value if isinstance(self.value, str) else str(self.value)
 
-    def __repr__(self):
-        return self._value
+    __repr__ = __str__
 
 
 PropertyValue = Union[Property, str, None]
@@ -142,6 +146,8 @@ PropertyItem = Tuple[str, Optional[Property]]
 
 class ZFS:
 
+    __slots__ = ('_name', '_props', '_user_props', '_type')
+
     _prop_names = []
 
     def __init__(self, name: str, properties: Optional[Properties] = None) -> None:
@@ -158,7 +164,15 @@ class ZFS:
     @property
     def properties(self) -> Iterable[PropertyItem]:
         yield from ((self._prop_names[k], v) for (k, v) in self._props.items())
-        yield from self._user_props
+        yield from self._user_props.items()
+
+    @classmethod
+    def _unchecked(cls, name: str, properties: Optional[Properties] = None, **fields):
+        obj = cls.__new__(cls)
+        for k, v in fields.items():
+            setattr(obj, k, v)
+        ZFS.__init__(obj, name, properties)
+        return obj
 
     def reset(self):
         self._props = {}
@@ -196,6 +210,8 @@ class ZFS:
                 raise ValueError(k + ' is not a valid ' + self.__class__.__name__ + ' property')
 
     def __getattr__(self, k: str) -> Optional[Property]:
+        if k.startswith('_'):
+            raise AttributeError(k)
         Validate.attribute(k)
         try:
             i = self._prop_names.index(k)
@@ -211,28 +227,21 @@ class ZFS:
 
     @staticmethod
     def from_name(name: str, dstype: Optional[str] = None, properties: Optional[Properties] = None):
-        d = {
-            'filesystem': Filesystem,
-            'volume': Volume,
-            'dataset': Dataset,
-            'snapshot': Snapshot,
-            'bookmark': Bookmark
-        }
         if dstype is not None:
-            try:
-                return d[dstype].from_name(name, properties=properties)
-            except KeyError:
+            cls = _TYPE_MAP.get(dstype.lower())
+            if cls is None:
                 raise ValueError(dstype + ' is not a valid ZFS type')
-        else:
-            for dstype in [Dataset, Snapshot, Bookmark]:
-                try:
-                    return dstype.from_name(name, properties=properties)
-                except ValueError:
-                    pass
-        raise ValueError('Could not guess ZFS object type')
+            return cls.from_name(name, properties=properties)
+
+        cls = Snapshot if '@' in name else Bookmark if '#' in name else Dataset
+        try:
+            return cls.from_name(name, properties=properties)
+        except ValueError:
+            raise ValueError('Could not guess ZFS object type')
 
 
 class Dataset(ZFS):
+    __slots__ = ()
     _prop_names = PropertyNames.dataset
 
     def __init__(self, name: str, properties: Optional[Properties] = None) -> None:
@@ -245,6 +254,7 @@ class Dataset(ZFS):
 
 
 class Filesystem(Dataset):
+    __slots__ = ()
     _prop_names = PropertyNames.dataset + PropertyNames.filesystem + PropertyNames.apple
 
     def __init__(self, name: str, properties: Optional[Properties] = None) -> None:
@@ -253,6 +263,7 @@ class Filesystem(Dataset):
 
 
 class Volume(Dataset):
+    __slots__ = ()
     _prop_names = PropertyNames.dataset + PropertyNames.volume
 
     def __init__(self, name: str, properties: Optional[Properties] = None) -> None:
@@ -261,6 +272,7 @@ class Volume(Dataset):
 
 
 class Snapshot(ZFS):
+    __slots__ = ('_dataset',)
     __prop_names = PropertyNames.snapshot
 
     def __init__(self, ds: Dataset, name: str, properties: Optional[Properties] = None) -> None:
@@ -282,8 +294,10 @@ class Snapshot(ZFS):
 
     @classmethod
     def from_name(cls, name: str, dstype='snapshot', properties: Optional[Properties] = None):
-        ds, name = name.split('@')
-        return cls(Dataset(ds), name, properties)
+        # The full name is validated once, so the dataset part does not need to be checked again
+        Validate.snapshot(name)
+        ds = Dataset._unchecked(name[:name.index('@')])
+        return cls._unchecked(name, properties, _dataset=ds, _type='snapshot')
 
     @property
     def _prop_names(self):
@@ -297,14 +311,16 @@ class Snapshot(ZFS):
 
 class SnapshotRange:
 
+    __slots__ = ('_dataset', '_first', '_last', '_short', '_name')
+
     def __init__(self, dataset: Optional[Dataset] = None, first: Optional[Snapshot] = None,
                  last: Optional[Snapshot] = None):
 
         if dataset is not None and not isinstance(dataset, Dataset):
             raise ValueError('Expected Filesystem, Volume or Dataset, got ' + type(dataset).__name__ + ' instead')
         for snap in first, last:
-            if snap is not None and not isinstance(dataset, Snapshot):
-                raise ValueError('Expected Snapshot, got ' + type(dataset).__name__ + ' instead')
+            if snap is not None and not isinstance(snap, Snapshot):
+                raise ValueError('Expected Snapshot, got ' + type(snap).__name__ + ' instead')
 
         self._dataset = dataset
         self._first = first
@@ -318,6 +334,10 @@ class SnapshotRange:
         if self._dataset is None:
             raise ValueError('Could not determine snapshot dataset')
 
+        # The range is immutable, so its names are formatted once
+        self._short = f"{first.short if first else ''}%{last.short if last else ''}"
+        self._name = f'{self._dataset.name}@{self._short}'
+
     @property
     def dataset(self):
         return self._dataset
@@ -332,11 +352,11 @@ class SnapshotRange:
 
     @property
     def name(self):
-        return self.dataset + '@' + self.short
+        return self._name
 
     @property
     def short(self):
-        return self._first.short if self._first else '' + '%' + self._last.short if self._last else ''
+        return self._short
 
     @classmethod
     def from_name(cls, name: Optional[str] = None, first: Optional[str] = None, last: Optional[str] = None):
@@ -371,6 +391,7 @@ class SnapshotRange:
 
 
 class Bookmark(ZFS):
+    __slots__ = ('_dataset',)
     _prop_names = PropertyNames.bookmark
 
     def __init__(self, ds: Dataset, name: str, properties: Optional[Properties] = None):
@@ -393,5 +414,15 @@ class Bookmark(ZFS):
 
     @classmethod
     def from_name(cls, name: str, dstype='bookmark', properties: Optional[Properties] = None):
-        ds, name = name.split('#')
-        return cls(Dataset(ds), name, properties)
+        Validate.bookmark(name)
+        ds = Dataset._unchecked(name[:name.index('#')])
+        return cls._unchecked(name, properties, _dataset=ds, _type='bookmark')
+
+
+_TYPE_MAP = {
+    'filesystem': Filesystem,
+    'volume': Volume,
+    'dataset': Dataset,
+    'snapshot': Snapshot,
+    'bookmark': Bookmark
+}
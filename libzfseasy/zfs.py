@@ -1,12 +1,15 @@
 from libzfseasy.types import Validate, ZFS, Dataset, Filesystem, Volume, Snapshot as Snap, Bookmark as Bookmk, \
-     SnapshotRange, Property, Properties
+     SnapshotRange, Property, Properties, PropertyItem
 from typing import Optional, Union, Dict, Iterable, Callable
 
+import errno
 import io
-import subprocess
+import os
+import stat
 import shutil
 
 ZFS_BIN = shutil.which('zfs')
+ZFS_WORKER = os.environ.get('LIBZFSEASY_WORKER', '').strip().lower() not in ('', '0', 'false', 'no', 'off')
 
 Snapshots = Union[Snap, SnapshotRange]
 SnapshotList = Union[Snapshots, Iterable[Snapshots]]
@@ -17,10 +20,28 @@ StringList = Union[str, Iterable[str]]
 Sort = Union[str, Iterable[str], Dict[str, bool]]
 
 
+class ZFSError(Exception):
+    """Raised when a zfs command exits with an error"""
+
+
 class Command:
 
+    _SUBCOMMAND: Optional[str] = None
+    _KEY_OPTIONS = ('keyformat=', 'keylocation=')
+    _PROMPTS = False
+    _PROMPT_FLAGS = ()
+
+    @classmethod
+    def _argv(cls, *args):
+        # ZFS_BIN is looked up on every call, so reassigning it after import still takes effect
+        return [ZFS_BIN, cls._SUBCOMMAND, *args]
+
     @classmethod
     def _exec(cls, cmd):
+        import subprocess
+        if cls._use_worker(cmd):
+            ZFSWorker.run(cmd)
+            return
         process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
         errors = []
         while True:
@@ -30,6 +51,10 @@ class Command:
 
     @classmethod
     def _exec_out(cls, cmd):
+        import subprocess
+        if cls._use_worker(cmd):
+            yield from ZFSWorker.run(cmd)
+            return
         process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
         errors = []
         while True:
@@ -39,6 +64,14 @@ class Command:
             elif output != '':
                 yield output
 
+    @classmethod
+    def _use_worker(cls, cmd) -> bool:
+        # The worker reads one command per line, so arguments with newlines go through a fresh process.
+        # It also runs commands without stdin, so anything that may prompt for a key does the same.
+        if not ZFS_WORKER or cls._PROMPTS or any(flag in cmd for flag in cls._PROMPT_FLAGS):
+            return False
+        return not any('\n' in str(c) or str(c).startswith(cls._KEY_OPTIONS) for c in cmd)
+
     @staticmethod
     def _exec_capture(process, errors):
         stdout = process.stdout.readline()
@@ -51,22 +84,229 @@ class Command:
             return stdout.strip()
         if stdout == '' and stderr == '' and rc is not None:
             if rc != 0:
-                raise Exception('\n'.join(errors))
+                raise ZFSError('\n'.join(errors))
             return False
         return None
 
+    @classmethod
+    def _stream(cls, process, stream) -> 'ProcessStream':
+        import threading
+        errors = []
+        drain = threading.Thread(target=cls._drain_stderr, args=(process, errors), daemon=True)
+        drain.start()
+        return ProcessStream(process, stream, errors, drain)
+
+    @staticmethod
+    def _drain_stderr(process, errors):
+        # Blocking reads on a dedicated thread work for any descriptor number, unlike select()
+        fd = process.stderr.fileno()
+        pending = b''
+        while True:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b'\n')
+            for line in lines:
+                Command._append_error(errors, line)
+        Command._append_error(errors, pending)
+
+    @staticmethod
+    def _pump(src_fd: int, dst_fd: int, bufsize: int = 1 << 20) -> int:
+        moved = 0
+        if hasattr(os, 'sendfile') and stat.S_ISREG(os.fstat(src_fd).st_mode):
+            # sendfile() copies regular files straight from the page cache into the destination
+            try:
+                while True:
+                    n = os.sendfile(dst_fd, src_fd, None, bufsize)
+                    if n == 0:
+                        return moved
+                    moved += n
+            except OSError as e:
+                if e.errno not in (errno.EINVAL, errno.ENOSYS):
+                    raise
+        elif hasattr(os, 'splice'):
+            # splice() moves pages between the descriptors in the kernel and releases the GIL on every call
+            try:
+                while True:
+                    n = os.splice(src_fd, dst_fd, bufsize, flags=os.SPLICE_F_MOVE | os.SPLICE_F_MORE)
+                    if n == 0:
+                        return moved
+                    moved += n
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+        while True:
+            chunk = os.read(src_fd, bufsize)
+            if not chunk:
+                return moved
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(dst_fd, view):]
+            moved += len(chunk)
+
+    @staticmethod
+    def _append_error(errors, line: bytes):
+        error = line.decode('utf-8', 'replace').strip()
+        if error:
+            errors.append(error[0].upper() + error[1:])
+
+
+class ZFSWorker:
+    """Long-lived shell running the zfs commands written to its standard input.
+
+    Reusing one helper process saves spawning a new subprocess from Python
+    for every command. Enabled by setting LIBZFSEASY_WORKER=1. Commands run
+    with no standard input, so commands that may prompt for a key are
+    executed in a fresh process instead. The shell inherits the environment
+    and working directory it was started with, so it is restarted whenever
+    either of them changes.
+    """
+
+    _SCRIPT = 'while IFS= read -r line; do eval "$line" </dev/null 2>"$1"; printf "\\n%s%d\\n" "$2" "$?"; done'
+
+    _instance = None
+    _locks = {}
+
+    def __init__(self):
+        import atexit
+        import secrets
+        import subprocess
+        import tempfile
+        self._marker = '__DONE__' + secrets.token_hex(8) + ':'
+        fd, self._errors = tempfile.mkstemp(prefix='libzfseasy-')
+        os.close(fd)
+        self._environ = dict(os.environ)
+        self._cwd = os.getcwd()
+        self._process = subprocess.Popen(['/bin/sh', '-c', self._SCRIPT, 'sh', self._errors, self._marker],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
+        atexit.register(self.close)
+
+    @classmethod
+    def run(cls, cmd) -> Iterable[str]:
+        lock = cls._locks.get('run')
+        if lock is None:
+            import threading
+            # dict.setdefault is atomic, so threads racing on first use still share one lock
+            lock = cls._locks.setdefault('run', threading.Lock())
+        with lock:
+            if cls._instance is None or not cls._instance._current():
+                if cls._instance is not None:
+                    cls._instance.close()
+                cls._instance = cls()
+            return cls._instance._run(cmd)
+
+    def _current(self) -> bool:
+        return self._process.poll() is None and self._cwd == os.getcwd() and self._environ == os.environ
+
+    def _run(self, cmd) -> Iterable[str]:
+        import shlex
+        self._process.stdin.write(shlex.join([str(c) for c in cmd]) + '\n')
+        self._process.stdin.flush()
+        output = []
+        for line in self._process.stdout:
+            if line.startswith(self._marker):
+                rc = int(line[len(self._marker):])
+                break
+            line = line.strip()
+            if line != '':
+                output.append(line)
+        else:
+            raise ZFSError('ZFS worker exited unexpectedly')
+        if rc != 0:
+            errors = []
+            with open(self._errors, 'rb') as f:
+                for line in f:
+                    Command._append_error(errors, line)
+            raise ZFSError('\n'.join(errors))
+        return output
+
+    def close(self):
+        import atexit
+        atexit.unregister(self.close)
+        self._process.stdin.close()
+        self._process.wait()
+        self._process.stdout.close()
+        if os.path.exists(self._errors):
+            os.unlink(self._errors)
+
+
+class ProcessStream(io.RawIOBase):
+    """Binary stream connected to a running zfs process.
+
+    Closing the stream waits for the process to exit and raises an exception
+    with the collected error output if the process failed. The stream is
+    unbuffered; wrap it in io.BufferedReader for line-oriented reading.
+    Writes always send the whole buffer, as io.BufferedWriter would.
+    """
+
+    def __init__(self, process, stream, errors, drain):
+        self._process = process
+        self._stream = stream
+        self._errors = errors
+        self._drain = drain
+        super().__init__()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def readable(self):
+        return self._stream.readable()
+
+    def writable(self):
+        return self._stream.writable()
+
+    def fileno(self):
+        return self._stream.fileno()
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+    def readall(self):
+        return self._stream.readall()
+
+    def readinto(self, b):
+        return self._stream.readinto(b)
+
+    def write(self, b):
+        # The pipe is unbuffered and may accept only part of the data, so keep writing until all of it is sent
+        view = memoryview(b).cast('B')
+        size = view.nbytes
+        while view:
+            view = view[self._stream.write(view):]
+        return size
+
+    def close(self):
+        import signal
+        if self.closed:
+            return
+        super().close()
+        self._stream.close()
+        rc = self._process.wait()
+        self._drain.join()
+        self._process.stderr.close()
+        # Closing a send stream before the end kills zfs with SIGPIPE, which is what the caller asked for
+        if rc == 0 or rc == -signal.SIGPIPE:
+            return
+        if rc < 0:
+            try:
+                name = signal.Signals(-rc).name
+            except ValueError:
+                name = f'signal {-rc}'
+            self._errors.append('Terminated by ' + name)
+        raise ZFSError('\n'.join(self._errors))
+
 
 class PropertyCommand:
 
     @staticmethod
-    def _get_props(properties: Properties, flag: bool = False):
-        cmd = []
-        for k, v in properties:
-            if flag:
-                cmd += ['-o', k + '=' + str(v)]
-            else:
-                cmd += [k + '=' + str(v)]
-        return cmd
+    def _get_props(properties: Union[Properties, Iterable[PropertyItem], None], flag: bool = False):
+        if not properties:
+            return []
+        if isinstance(properties, dict):
+            properties = properties.items()
+        if flag:
+            return [arg for k, v in properties for arg in ('-o', f'{k}={v}')]
+        return [f'{k}={v}' for k, v in properties]
 
 
 class StringListArgument:
@@ -127,6 +367,8 @@ class ZFSListArgument:
 
 class List(Command, StringListArgument, DatasetListArgument):
 
+    _SUBCOMMAND = 'list'
+
     def __call__(self, *args, **kwargs):
         """List ZFS datasets.
 
@@ -151,7 +393,7 @@ class List(Command, StringListArgument, DatasetListArgument):
               depth: int = 0, properties: Optional[StringList] = None, sort: Optional[Sort] = None,
               asc: bool = True, lazy=False) -> Iterable[ZFS]:
 
-        cmd = [ZFS_BIN, 'list', '-H']
+        cmd = cls._argv('-H')
 
         if not recursive:
             cmd += ['-d', '1']
@@ -202,8 +444,10 @@ class List(Command, StringListArgument, DatasetListArgument):
         return ZFS.from_name(name, dstype, props)
 
 
-class Create(Command):
-    
+class Create(Command, PropertyCommand):
+
+    _SUBCOMMAND = 'create'
+
     def __call__(self, *args, **kwargs):
         """Create ZFS filesystem or volume.
 
@@ -239,14 +483,12 @@ class Create(Command):
         """
 
         filesystem = Filesystem(ds, properties)
-        cmd = [ZFS_BIN, 'create']
+        cmd = cls._argv()
         if parents:
             cmd += ['-p']
         if not mount:
             cmd += ['-u']
-        if properties:
-            for k, v in filesystem.properties:
-                cmd += ['-o', k + '=' + str(v)]
+        cmd += cls._get_props(filesystem.properties, True)
         cmd += [str(filesystem)]
         cls._exec(cmd)
 
@@ -270,21 +512,21 @@ class Create(Command):
         """
 
         volume = Volume(ds, properties)
-        cmd = [ZFS_BIN, 'create', '-V', size]
+        cmd = cls._argv('-V', size)
         if parents:
             cmd += ['-p']
         if not sparse:
             cmd += ['-s']
-        if properties:
-            for k, v in volume.properties:
-                cmd += ['-o', k + '=' + str(v)]
+        cmd += cls._get_props(volume.properties, True)
         cmd += [str(volume)]
         cls._exec(cmd)
 
         return volume
 
 
-class Snapshot(Command):
+class Snapshot(Command, PropertyCommand):
+
+    _SUBCOMMAND = 'snapshot'
 
     def __call__(self, *args, **kwargs):
         return self._snapshot(*args, **kwargs)
@@ -294,12 +536,10 @@ class Snapshot(Command):
                   properties: Optional[Properties] = None) -> Snap:
 
         snapshot = Snap(ds, name, properties)
-        cmd = [ZFS_BIN, 'snapshot']
+        cmd = cls._argv()
         if recursive:
             cmd += ['-r']
-        if properties:
-            for k, v in snapshot.properties:
-                cmd += ['-o', k + '=' + str(v)]
+        cmd += cls._get_props(snapshot.properties, True)
         cmd += [str(snapshot)]
         cls._exec(cmd)
 
@@ -308,6 +548,8 @@ class Snapshot(Command):
 
 class Bookmark(Command):
 
+    _SUBCOMMAND = 'bookmark'
+
     def __call__(self, *args, **kwargs):
         return self._bookmark(*args, **kwargs)
 
@@ -317,7 +559,7 @@ class Bookmark(Command):
             raise ValueError('Expected Bookmark or Snapshot, got ' + type(ds).__name__ + ' instead')
 
         bookmark = Bookmk(ds.dataset, name)
-        cmd = [ZFS_BIN, 'bookmark', str(bookmark)]
+        cmd = cls._argv(str(bookmark))
         cls._exec(cmd)
 
         return bookmark
@@ -325,6 +567,8 @@ class Bookmark(Command):
 
 class Destroy(Command):
 
+    _SUBCOMMAND = 'destroy'
+
     def __call__(self, *args, **kwargs):
         return self._destroy(*args, **kwargs)
 
@@ -340,9 +584,9 @@ class Destroy(Command):
         else:
             raise ValueError('Expected Filesystem, Volume, Snapshot or Bookmark, got ' + type(ds).__name__ + ' instead')
 
-    @staticmethod
-    def _base(destroy: bool = False, recursive: bool = False, clones: bool = False) -> Iterable[str]:
-        cmd = [ZFS_BIN, 'destroy', '-v', '-p']
+    @classmethod
+    def _base(cls, destroy: bool = False, recursive: bool = False, clones: bool = False) -> Iterable[str]:
+        cmd = cls._argv('-v', '-p')
         if not destroy:
             cmd += ['-n']
         if recursive:
@@ -403,12 +647,14 @@ class Destroy(Command):
         if not isinstance(bookmark, Bookmk):
             raise ValueError('Expected Bookmark, got ' + type(bookmark).__name__ + ' instead')
 
-        cmd = [ZFS_BIN, 'destroy', bookmark]
+        cmd = cls._argv(str(bookmark))
         cls._exec(cmd)
 
 
 class Rename(Command):
 
+    _SUBCOMMAND = 'rename'
+
     def __call__(self, *args, **kwargs):
         return self._rename(*args, **kwargs)
 
@@ -423,9 +669,9 @@ class Rename(Command):
         else:
             raise ValueError('Expected Filesystem, Volume or Snapshot, got ' + type(ds).__name__ + ' instead')
 
-    @staticmethod
-    def _base(force: bool = False, parents: bool = False):
-        cmd = [ZFS_BIN, 'rename']
+    @classmethod
+    def _base(cls, force: bool = False, parents: bool = False):
+        cmd = cls._argv()
         if force:
             cmd += ['-f']
         if parents:
@@ -472,6 +718,8 @@ class Rename(Command):
 
 class Allow(Command, StringListArgument):
 
+    _SUBCOMMAND = 'allow'
+
     def __call__(self, *args, **kwargs):
         return self._allow(True, *args, **kwargs)
 
@@ -526,23 +774,22 @@ class Allow(Command, StringListArgument):
         cmd += [name, cls._slist_to_str(permissions), ds]
         cls._exec(cmd)
 
-    @staticmethod
-    def _base(allow: bool, param: Optional[str] = None, recursive: bool = False) -> Iterable[str]:
-        extra = [param] if param else []
+    @classmethod
+    def _base(cls, allow: bool, param: Optional[str] = None, recursive: bool = False) -> Iterable[str]:
+        cmd = cls._argv() + ([param] if param else [])
         if allow:
-            cmd = [ZFS_BIN, 'allow'] + extra
             if recursive:
                 raise TypeError('_zfs_allow_base() got an unexpected keyword argument \'recursive\'')
-        else:
-            cmd = [ZFS_BIN, 'unallow'] + extra
-            if recursive:
-                cmd += ['-r']
+        elif recursive:
+            cmd += ['-r']
 
         return cmd
 
 
 class UnAllow(Allow):
 
+    _SUBCOMMAND = 'unallow'
+
     def __call__(self, *args, **kwargs):
         return self._allow(False, *args, **kwargs)
 
@@ -553,7 +800,9 @@ class UnAllow(Allow):
         return self._set(False, *args, **kwargs)
 
 
-class Clone(Command):
+class Clone(Command, PropertyCommand):
+
+    _SUBCOMMAND = 'clone'
 
     def __call__(self, *args, **kwargs):
         return self._clone(*args, **kwargs)
@@ -562,12 +811,10 @@ class Clone(Command):
     def _clone(cls, snapshot: Snapshot, ds: str, properties: Optional[Properties] = None, parents=False) -> Dataset:
 
         dataset = Dataset(ds, properties)
-        cmd = [ZFS_BIN, 'clone']
+        cmd = cls._argv()
         if parents:
             cmd += ['-p']
-        if properties:
-            for k, v in dataset.properties:
-                cmd += ['-o', k + '=' + str(v)]
+        cmd += cls._get_props(dataset.properties, True)
         cmd += [str(snapshot), str(dataset)]
         cls._exec(cmd)
 
@@ -576,6 +823,8 @@ class Clone(Command):
 
 class Get(Command, StringListArgument, ZFSListArgument):
 
+    _SUBCOMMAND = 'get'
+
     def __call__(self, *args, **kwargs):
         return self._get(*args, **kwargs)
 
@@ -588,7 +837,7 @@ class Get(Command, StringListArgument, ZFSListArgument):
         types = cls._slist_to_str(types, validator=Validate.type)
         properties = cls._slist_to_list(properties, validator=Validate.attribute)
         datasets = cls._zlist_to_str(ds)
-        cmd = [ZFS_BIN, 'get', '-H', '-o', 'all'] + \
+        cmd = cls._argv('-H', '-o', 'all') + \
             cls._get_options(recursive=recursive, depth=depth, types=types, properties=properties, datasets=datasets)
         result = cls._lines_to_objects((line for line in cls._exec_out(cmd)), sources)
 
@@ -645,7 +894,9 @@ class Get(Command, StringListArgument, ZFSListArgument):
             yield ZFS.from_name(dsname, dstype, properties)
 
 
-class Set(Command):
+class Set(Command, PropertyCommand):
+
+    _SUBCOMMAND = 'set'
 
     def __call__(self, *args, **kwargs):
         return self._set(*args, **kwargs)
@@ -654,24 +905,16 @@ class Set(Command):
     def _set(cls, ds: Datasets, properties: Properties) -> Datasets:
 
         ds.update(properties)
-        cmd = [ZFS_BIN, 'set'] + cls._get_props(properties) + [str(ds)]
+        cmd = cls._argv() + cls._get_props(properties) + [str(ds)]
         cls._exec(cmd)
 
         return ds
 
-    @staticmethod
-    def _get_props(properties: Properties, flag: bool = False):
-        cmd = []
-        for k, v in properties:
-            if flag:
-                cmd += ['-o', k + '=' + str(v)]
-            else:
-                cmd += [k + '=' + str(v)]
-        return cmd
-
 
 class Inherit(Command):
 
+    _SUBCOMMAND = 'inherit'
+
     def __call__(self, *args, **kwargs):
         return self._inherit(*args, **kwargs)
 
@@ -679,7 +922,7 @@ class Inherit(Command):
     def _inherit(cls, ds: Datasets, prop: str, recursive: bool = False, received: bool = False) -> Datasets:
 
         ds.update({prop: None})
-        cmd = [ZFS_BIN, 'inherit', prop] + cls._get_options(recursive=recursive, received=received) + [str(ds)]
+        cmd = cls._argv(prop) + cls._get_options(recursive=recursive, received=received) + [str(ds)]
         cls._exec(cmd)
 
         return ds
@@ -696,21 +939,39 @@ class Inherit(Command):
 
 class Send(Command):
 
+    _SUBCOMMAND = 'send'
+
     def __call__(self, *args, **kwargs):
         return self._send(*args, **kwargs)
 
     @classmethod
-    def _send(cls, ds: Datasets, *args, **kwargs) -> Optional[io.BufferedReader]:
+    def _send(cls, ds: Datasets, *args, **kwargs) -> ProcessStream:
         if isinstance(ds, Dataset):
             return cls.dataset(ds, *args, **kwargs)
-        elif isinstance(ds, Snapshot):
+        elif isinstance(ds, Snap):
             return cls.snapshot(ds, *args, **kwargs)
 
+    @classmethod
+    def to_fd(cls, fd: int, ds: Datasets, *args, **kwargs) -> int:
+        """Write a send stream for a given ZFS dataset or snapshot directly to a file descriptor
+
+        Keyword arguments:
+            fd: int -- file descriptor to write the stream to
+            ds: Datasets -- source ZFS dataset or snapshot
+            args, kwargs -- options passed on to dataset() or snapshot()
+
+        Returns:
+            Number of bytes written
+        """
+
+        with cls._send(ds, *args, **kwargs) as stream:
+            return cls._pump(stream.fileno(), fd)
+
     @classmethod
     def snapshot(cls, ds: Snap, since: Optional[Snap] = None, intermediate: bool = False,
                  replicate: bool = False, holds: bool = False, properties: bool = False, backup: bool = False,
                  raw: bool = False, compressed: bool = False, embed: bool = False, large_blocks: bool = False,
-                 skip_missing: bool = False) -> Optional[io.BufferedReader]:
+                 skip_missing: bool = False) -> ProcessStream:
 
         """Generate a send stream for a given ZFS snapshot
 
@@ -729,10 +990,10 @@ class Send(Command):
             skip_missing: bool -- skip over missing snapshots (default False)
 
         Returns:
-            BufferedReader
+            ProcessStream
         """
 
-        cmd = [ZFS_BIN, 'send'] + \
+        cmd = cls._argv() + \
             cls._get_options(since=since, intermediate=intermediate, replicate=replicate, holds=holds,
                              properties=properties, backup=backup, raw=raw, compressed=compressed, embed=embed,
                              large_blocks=large_blocks, skip_missing=skip_missing) + [str(ds)]
@@ -741,7 +1002,7 @@ class Send(Command):
 
     @classmethod
     def dataset(cls, ds: Dataset, since: Optional[Snap] = None, raw: bool = False, compressed: bool = False,
-                embed: bool = False, large_blocks: bool = False) -> Optional[io.BufferedReader]:
+                embed: bool = False, large_blocks: bool = False) -> ProcessStream:
 
         """Generate a send stream for a given ZFS dataset
 
@@ -754,10 +1015,10 @@ class Send(Command):
             large_blocks: bool -- generate a stream which may contain blocks larger than 128KB (default False)
 
         Returns:
-            BufferedReader
+            ProcessStream
         """
 
-        cmd = [ZFS_BIN, 'send'] + \
+        cmd = cls._argv() + \
             cls._get_options(since=since, raw=raw, compressed=compressed, embed=embed,
                              large_blocks=large_blocks) + [str(ds)]
 
@@ -766,7 +1027,7 @@ class Send(Command):
     @classmethod
     def redact(cls, ds: Snap, redact: Bookmk, since: Union[Snap, Bookmk, None] = None,
                properties: bool = False, compressed: bool = False, embed: bool = False,
-               large_blocks: bool = False) -> Optional[io.BufferedReader]:
+               large_blocks: bool = False) -> ProcessStream:
 
         """Generate a redacted send stream
 
@@ -780,17 +1041,17 @@ class Send(Command):
             large_blocks: bool -- generate a stream which may contain blocks larger than 128KB (default False)
 
         Returns:
-            BufferedReader
+            ProcessStream
         """
 
-        cmd = [ZFS_BIN, 'send', '--redact', str(redact)] + \
+        cmd = cls._argv('--redact', str(redact)) + \
             cls._get_options(since=since, properties=properties, compressed=compressed, embed=embed,
                              large_blocks=large_blocks) + [str(ds)]
 
         return cls._exec_stream(cmd)
 
     @classmethod
-    def resume(cls, token: str, embed: bool = False) -> Optional[io.BufferedReader]:
+    def resume(cls, token: str, embed: bool = False) -> ProcessStream:
         """Creates a send stream which resumes an interrupted receive
 
          Keyword arguments:
@@ -798,13 +1059,13 @@ class Send(Command):
             embed: bool -- generate a more compact stream by using the embedded_data pool feature (default False)
 
         Returns:
-            BufferedReader
+            ProcessStream
         """
-        cmd = [ZFS_BIN, 'send'] + cls._get_options(embed=embed) + ['-t', token]
+        cmd = cls._argv() + cls._get_options(embed=embed) + ['-t', token]
         return cls._exec_stream(cmd)
 
     @classmethod
-    def partial(cls, ds: Dataset, since: Optional[Snapshot] = None) -> Optional[io.BufferedReader]:
+    def partial(cls, ds: Dataset, since: Optional[Snapshot] = None) -> ProcessStream:
         """Generate a send stream from a dataset that has been partially received
 
         Keyword arguments:
@@ -812,10 +1073,10 @@ class Send(Command):
             since: Snapshot -- generate incremental stream from the specified snapshot (default None)
 
         Returns:
-            BufferedReader
+            ProcessStream
         """
 
-        cmd = [ZFS_BIN, 'send'] + cls._get_options(since=since) + ['-S', str(ds)]
+        cmd = cls._argv() + cls._get_options(since=since) + ['-S', str(ds)]
 
         return cls._exec_stream(cmd)
 
@@ -855,52 +1116,48 @@ class Send(Command):
         return cmd
 
     @classmethod
-    def _exec_stream(cls, cmd) -> Optional[io.BufferedReader]:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        errors = []
-        while True:
-            output = cls._exec_capture_bin(process, errors)
-            if output is False:
-                break
-            elif output is not None:
-                return output
-        return None
+    def _exec_stream(cls, cmd) -> ProcessStream:
+        import subprocess
+        # Unbuffered pipes hand out the raw FileIO, saving a user-space copy per read on large streams
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, close_fds=True)
+        return cls._stream(process, process.stdout)
 
-    @staticmethod
-    def _exec_capture_bin(process, errors) -> Union[bool, io.BufferedReader, None]:
-        stdout = process.stdout.peek(8)
-        stderr = io.TextIOWrapper(process.stderr).readline()
-        rc = process.poll()
-        if stderr:
-            error = stderr.strip()
-            errors.append(error[0].upper() + error[1:])
-        if len(stdout):
-            return process.stdout
-        elif stderr != '' and rc is not None:
-            if rc != 0:
-                raise Exception('\n'.join(errors))
-            return False
-        else:
-            return None
 
+class Receive(Command, StringListArgument, PropertyCommand):
 
-class Receive(Command, StringListArgument):
+    _SUBCOMMAND = 'receive'
 
     def __call__(self, *args, **kwargs):
         return self._receive(*args, **kwargs)
 
     @classmethod
-    def _receive(cls, ds: Datasets, *args, **kwargs) -> Optional[io.BufferedWriter]:
+    def _receive(cls, ds: Datasets, *args, **kwargs) -> ProcessStream:
         if isinstance(ds, Filesystem):
             return cls.filesystem(ds, *args, **kwargs)
         else:
             return cls.dataset(ds, *args, **kwargs)
 
+    @classmethod
+    def from_fd(cls, fd: int, ds: Datasets, *args, **kwargs) -> int:
+        """Receive a ZFS stream read directly from a file descriptor
+
+        Keyword arguments:
+            fd: int -- file descriptor to read the stream from
+            ds: Datasets -- target ZFS dataset
+            args, kwargs -- options passed on to filesystem() or dataset()
+
+        Returns:
+            Number of bytes received
+        """
+
+        with cls._receive(ds, *args, **kwargs) as stream:
+            return cls._pump(fd, stream.fileno())
+
     @classmethod
     def filesystem(cls, ds: Filesystem, props: Optional[Properties] = None, reset: Optional[StringList] = None,
                    origin: Optional[Snap] = None, force: bool = False, holds: bool = True, unmount: bool = False,
                    save: bool = False, mount: bool = True, ignore_first: bool = False,
-                   ignore_all: bool = False) -> Optional[io.BufferedWriter]:
+                   ignore_all: bool = False) -> ProcessStream:
 
         """Receive ZFS filesystem stream
 
@@ -918,9 +1175,9 @@ class Receive(Command, StringListArgument):
             ignore_all: bool -- discard all but the last part of snapshot filesystem name (default False)
 
         Returns:
-            BufferedWriter
+            ProcessStream
         """
-        cmd = [ZFS_BIN, 'receive'] + \
+        cmd = cls._argv() + \
             cls._get_options(props=props, reset=reset, origin=origin, force=force, holds=holds, unmount=unmount,
                              save=save, mount=mount, ignore_first=ignore_first, ignore_all=ignore_all) + [str(ds)]
 
@@ -929,7 +1186,7 @@ class Receive(Command, StringListArgument):
     @classmethod
     def dataset(cls, ds: Datasets, props: Optional[Properties] = None, reset: Optional[StringList] = None,
                 origin: Optional[Snap] = None, force: bool = False, holds: bool = True, unmount: bool = False,
-                save: bool = False, mount: bool = True) -> Optional[io.BufferedWriter]:
+                save: bool = False, mount: bool = True) -> ProcessStream:
 
         """Receive ZFS filesystem stream
 
@@ -945,9 +1202,9 @@ class Receive(Command, StringListArgument):
             mount: bool -- whether to mount the received filesystem (default True)
 
         Returns:
-            BufferedWriter
+            ProcessStream
         """
-        cmd = [ZFS_BIN, 'receive'] + \
+        cmd = cls._argv() + \
             cls._get_options(props=props, reset=reset, origin=origin, force=force, holds=holds, unmount=unmount,
                              save=save, mount=mount) + [str(ds)]
 
@@ -964,7 +1221,7 @@ class Receive(Command, StringListArgument):
             None
         """
 
-        cmd = [ZFS_BIN, '-A'] + [str(ds)]
+        cmd = cls._argv('-A', str(ds))
 
         return cls._exec(cmd)
 
@@ -979,7 +1236,7 @@ class Receive(Command, StringListArgument):
             cmd += cls._get_props(props, True)
         reset = kwargs.get('reset', None)
         if reset:
-            cmd += ['-x ' + s for s in cls._slist_to_list(reset)]
+            cmd += [arg for s in cls._slist_to_list(reset) for arg in ('-x', s)]
         if kwargs.get('force', False):
             cmd += ['-F']
         if not kwargs.get('holds', True):
@@ -997,45 +1254,19 @@ class Receive(Command, StringListArgument):
 
         return cmd
 
-    @staticmethod
-    def _get_props(properties: Properties, flag: bool = False):
-        cmd = []
-        for k, v in properties:
-            if flag:
-                cmd += ['-o', k + '=' + str(v)]
-            else:
-                cmd += [k + '=' + str(v)]
-        return cmd
-
     @classmethod
-    def _exec_stream_in(cls, cmd) -> Optional[io.BufferedWriter]:
-        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        errors = []
-        while True:
-            output = cls._exec_input_bin(process, errors)
-            if output is False:
-                break
-            elif output is not None:
-                return output
-        return None
-
-    @staticmethod
-    def _exec_input_bin(process, errors):
-        stderr = io.TextIOWrapper(process.stderr).readline()
-        rc = process.poll()
-        if stderr:
-            error = stderr.strip()
-            errors.append(error[0].upper() + error[1:])
-        if rc is not None and rc != 0:
-            raise Exception('\n'.join(errors))
-        elif stderr != '':
-            return None
-        else:
-            return process.stdin
+    def _exec_stream_in(cls, cmd) -> ProcessStream:
+        import subprocess
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   bufsize=0, close_fds=True)
+        return cls._stream(process, process.stdin)
 
 
 class LoadKey(Command):
 
+    _SUBCOMMAND = 'load-key'
+    _PROMPTS = True
+
     def __call__(self, *args, **kwargs):
         """Load the dataset key
 
@@ -1053,14 +1284,14 @@ class LoadKey(Command):
     @classmethod
     def _load_key(cls, ds: Optional[Filesystem], location: Optional[str] = None, recursive: bool = False) -> None:
         if ds is not None:
-            cmd = [ZFS_BIN, 'load-key'] + cls._get_options(location=location, recursive=recursive) + [str(ds)]
+            cmd = cls._argv() + cls._get_options(location=location, recursive=recursive) + [str(ds)]
         else:
             if location is not None:
                 raise ValueError('Key location cannot be explicitly specified when loading all keys')
             if recursive:
                 raise ValueError('Recursive cannot be specified when loading all keys')
 
-            cmd = [ZFS_BIN, 'load-key', '-a']
+            cmd = cls._argv('-a')
 
         return cls._exec(cmd)
 
@@ -1072,7 +1303,7 @@ class LoadKey(Command):
         if location and recursive:
             raise ValueError('Key location cannot be explicitly specified when loading keys recursively')
         elif location:
-            cmd += ['-L ' + location]
+            cmd += ['-L', location]
         elif recursive:
             cmd += ['-r']
 
@@ -1081,6 +1312,8 @@ class LoadKey(Command):
 
 class UnLoadKey(Command):
 
+    _SUBCOMMAND = 'unload-key'
+
     def __call__(self, *args, **kwargs):
         """Unload the dataset key
 
@@ -1097,12 +1330,12 @@ class UnLoadKey(Command):
     @classmethod
     def _unload_key(cls, ds: Optional[Filesystem], recursive: bool = False) -> None:
         if ds is not None:
-            cmd = [ZFS_BIN, 'unload-key'] + cls._get_options(recursive=recursive) + [str(ds)]
+            cmd = cls._argv() + cls._get_options(recursive=recursive) + [str(ds)]
         else:
             if recursive:
                 raise ValueError('Recursive cannot be specified when unloading all keys')
 
-            cmd = [ZFS_BIN, 'unload-key', '-a']
+            cmd = cls._argv('-a')
 
         return cls._exec(cmd)
 
@@ -1113,6 +1346,10 @@ class UnLoadKey(Command):
 
 class ChangeKey(Command):
 
+    _SUBCOMMAND = 'change-key'
+    _PROMPTS = True
+    _FLAG_MAP = {'inherit': '-i', 'load': '-l'}
+
     def __call__(self, *args, **kwargs):
         """Change the dataset key
 
@@ -1132,7 +1369,7 @@ class ChangeKey(Command):
     @classmethod
     def _change_key(cls, ds: Filesystem, inherit: bool = False, load: bool = False, location: Optional[str] = None,
                     fmt: Optional[str] = None, iterations: Optional[int] = None) -> None:
-        cmd = [ZFS_BIN, 'change-key'] + \
+        cmd = cls._argv() + \
               cls._get_options(inherit=inherit, load=load, location=location,
                                fmt=fmt, iterations=iterations) + [str(ds)]
 
@@ -1140,7 +1377,6 @@ class ChangeKey(Command):
 
     @classmethod
     def _get_options(cls, **kwargs):
-        cmd = []
         location = kwargs.get('location', None)
         fmt = kwargs.get('fmt', None)
         iterations = kwargs.get('iterations', None)
@@ -1151,21 +1387,22 @@ class ChangeKey(Command):
                 raise ValueError('Key format cannot be specified when inheriting keys')
             if iterations:
                 raise ValueError('Number of pbkdf2 iterations cannot be specified when inheriting keys')
-            cmd += ['-i']
-        if kwargs.get('load', None):
-            cmd += ['-l']
+        cmd = [flag for key, flag in cls._FLAG_MAP.items() if kwargs.get(key, None)]
         if location:
-            cmd += ['-o keylocation=' + location]
+            cmd += ['-o', 'keylocation=' + location]
         if fmt:
-            cmd += ['-o keyformat=' + fmt]
+            cmd += ['-o', 'keyformat=' + fmt]
         if iterations:
-            cmd += ['-o pbkdf2iters=' + str(iterations)]
+            cmd += ['-o', 'pbkdf2iters=' + str(iterations)]
 
         return cmd
 
 
 class Mount(Command, PropertyCommand):
 
+    _SUBCOMMAND = 'mount'
+    _PROMPT_FLAGS = ('-l',)
+
     def __call__(self, *args, **kwargs):
         """Mount ZFS dataset
 
@@ -1186,10 +1423,10 @@ class Mount(Command, PropertyCommand):
     def _mount(cls, ds: Optional[Filesystem], flags: Optional[StringList], properties: Optional[Properties],
                overlay: bool = False, load_keys: bool = False, force: bool = False) -> None:
         if ds is not None:
-            cmd = [ZFS_BIN, 'mount'] + cls._get_options(overlay=overlay, load_keys=load_keys, force=force) + \
+            cmd = cls._argv() + cls._get_options(overlay=overlay, load_keys=load_keys, force=force) + \
                   cls._get_properties(flags, properties) + [str(ds)]
         else:
-            cmd = [ZFS_BIN, 'mount', '-a']
+            cmd = cls._argv('-a')
 
         return cls._exec(cmd)
 
@@ -1216,6 +1453,8 @@ class Mount(Command, PropertyCommand):
 
 class UnMount(Command):
 
+    _SUBCOMMAND = 'unmount'
+
     def __call__(self, *args, **kwargs):
         """Unmount ZFS filesystem
 
@@ -1232,9 +1471,9 @@ class UnMount(Command):
     @classmethod
     def _unmount(cls, ds: Optional[Filesystem], force: bool = False, unload_keys: bool = False) -> None:
         if ds is not None:
-            cmd = [ZFS_BIN, 'unmount'] + cls._get_options(force=force, unload_keys=unload_keys) + [str(ds)]
+            cmd = cls._argv() + cls._get_options(force=force, unload_keys=unload_keys) + [str(ds)]
         else:
-            cmd = [ZFS_BIN, 'unmount', '-a']
+            cmd = cls._argv('-a')
 
         return cls._exec(cmd)
 